@@ -1,8 +1,10 @@
+import json
+import re
+from functools import lru_cache
 import streamlit as st
-from streamlit_agraph import agraph, Node, Edge, Config
-import pandas as pd
-from neo4j_utils import init_driver, run_query, is_connected
-from data_generator import generate_scenario_data
+import streamlit.components.v1 as components
+from neo4j_utils import init_driver, run_query_as_graph, get_write_version
+from snapshot_utils import load_snapshot, ego_subgraph
 
 # ==============================================================================
 # PAGE CONFIGURATION
@@ -49,29 +51,204 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ==============================================================================
+# DATA ACCESS
+# ==============================================================================
+# Project only the fields render_graph uses and aggregate the distinct nodes/edges of
+# all matched paths in the plan, so each query returns a single (nodes, edges) row.
+# Appended after a clause that binds `path`.
+GRAPH_PROJECTION = """
+WITH collect(path) AS ps
+CALL {
+    WITH ps
+    UNWIND ps AS p
+    UNWIND nodes(p) AS n
+    RETURN collect(DISTINCT {
+        id: n.id, label: coalesce(n.label, n.id), type: labels(n)[0],
+        is_fraud: coalesce(n.is_fraud, false), flagged: coalesce(n.flagged, false),
+        properties: {role: n.role, amount: n.amount, tenure: n.tenure, date: n.date}
+    }) AS nodes
+}
+CALL {
+    WITH ps
+    UNWIND ps AS p
+    UNWIND relationships(p) AS r
+    RETURN collect(DISTINCT {source: startNode(r).id, target: endNode(r).id, type: type(r)}) AS edges
+}
+RETURN nodes, edges
+"""
+
+# Scenario queries, built once; ids are always passed as parameters so each shape
+# maps to a single cached plan on the server.
+# Recycled Passenger, Claims, Drivers, and Facilitators
+Q_SCENARIO1 = """
+MATCH (c:Claim) WHERE c.id IN $ids
+MATCH path=(c)-[:FILED|PASSENGER_IN|TREATED_AT|REPRESENTED_BY|HAS_PHONE*1..3]-(related)
+WITH path LIMIT 100
+""" + GRAPH_PROJECTION
+
+# Both claims with their broader context (Policies, Vehicles, Shops)
+Q_SCENARIO2 = """
+MATCH (root:Claim) WHERE root.id IN $ids
+MATCH path = (root)-[:FILED|WITNESSED|HAS_PHONE|HOLDER|COVERS|INVOLVES|REPAIRED_AT|TREATED_AT*1..3]-(leaf)
+WITH path LIMIT 150
+""" + GRAPH_PROJECTION
+
+# Two-hop context of a single claim
+Q_SCENARIO3_CLAIM = "MATCH path=(c:Claim {id:$cid})-[*1..2]-(n)" + GRAPH_PROJECTION
+
+def _use_live():
+    """Live Neo4j mode is opt-in; the canned scenarios are served from bundled snapshots."""
+    return st.session_state.get('use_live_neo4j', False)
+
+class _NoResult(Exception):
+    """Raised instead of returning None so st.cache_data doesn't keep a failed query."""
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_query(cypher, params=()):
+    """Cached read query. Cleared whenever a scenario is regenerated."""
+    data = run_query_as_graph(cypher, dict(params))
+    if data is None: raise _NoResult()
+    return data
+
 # ==============================================================================
 # VISUALIZATION HELPERS
 # ==============================================================================
-def render_graph(data, height=500):
-    """Renders the interactive graph."""
+# Auto Insurance Color Palette
+_TYPE_COLORS = {
+    'Person': '#3498db',       # Blue
+    'Claim': '#9b59b6',        # Purple
+    'Shop': '#e67e22',         # Orange
+    'Doctor': '#2ecc71',       # Green
+    'Policy': '#34495e',       # Dark Grey
+    'Vehicle': '#95a5a6',      # Grey
+    'Phone': '#e74c3c',        # Red
+    'Address': '#f1c40f',      # Yellow
+    'Attorney': '#8e44ad',     # Violet
+}
+
+# Tooltip properties in display order: (key, label, formatter)
+_TOOLTIP_KEYS = (
+    ('role', "👤 Role", str),
+    ('amount', "💰 Amount", lambda v: f"${v:,}"),
+    ('tenure', "⏳ Tenure", str),
+    ('date', "📅 Date", str),
+)
+
+# Deterministic top-down tree layout for small, tree-shaped subgraphs
+_HIERARCHICAL_OPTIONS = {'enabled': True, 'direction': 'UD', 'sortMethod': 'directed'}
+
+# Graphs at or above this size are streamed into a raw vis.js canvas in chunks
+STREAM_THRESHOLD = 500
+STREAM_CHUNK_SIZE = 500
+
+# Pinned vis-network build for the streamed canvas; bump both together
+VIS_NETWORK_VERSION = "9.1.2"
+VIS_NETWORK_SRI = "sha512-LnvoEWDFrqGHlHmDD2101OrLcbsfkrzoSpvtSQtxK3RMnRV0eOkhhBN2dXHKRrUU8p2DGRTk35n4O8nWSVe1mQ=="
+
+_STREAM_TEMPLATE = """
+<script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/__VIS_VERSION__/dist/vis-network.min.js"
+        integrity="__VIS_SRI__" crossorigin="anonymous" referrerpolicy="no-referrer"></script>
+<div id="graph" style="width:100%; height:__HEIGHT__px;"></div>
+<script>
+    const nodeChunks = __NODE_CHUNKS__;
+    const edgeChunks = __EDGE_CHUNKS__;
+    const nodes = new vis.DataSet(nodeChunks.shift() || []);
+    const edges = new vis.DataSet();
+    const network = new vis.Network(document.getElementById("graph"), {nodes, edges}, {
+        edges: {arrows: "to"},
+        physics: {enabled: __PHYSICS__, stabilization: false},
+        layout: __LAYOUT__,
+        interaction: {hover: true},
+    });
+    // Paint the first chunk immediately, then add the rest one frame at a time
+    function addNext() {
+        if (nodeChunks.length) nodes.add(nodeChunks.shift());
+        else if (edgeChunks.length) edges.add(edgeChunks.shift());
+        else {
+            // Without live physics, lay out once in the browser and then freeze
+            if (__FREEZE__) {
+                network.once("stabilizationIterationsDone", () => network.setOptions({physics: {enabled: false}}));
+                network.setOptions({physics: {enabled: true}});
+                network.stabilize();
+            }
+            return;
+        }
+        requestAnimationFrame(addNext);
+    }
+    requestAnimationFrame(addNext);
+</script>
+"""
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _script_json(value):
+    """JSON safe to inline in a <script> block: a `</script>` in the data can't close it."""
+    return (json.dumps(value)
+            .replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026"))
+
+def _render_streamed(nodes, edges, height, physics, hierarchical):
+    """Renders large graphs by feeding vis.js incremental DataSet updates instead of one blob."""
+    layout = {'hierarchical': _HIERARCHICAL_OPTIONS} if hierarchical else {}
+    values = {
+        'VIS_VERSION': VIS_NETWORK_VERSION,
+        'VIS_SRI': VIS_NETWORK_SRI,
+        'HEIGHT': str(height),
+        'PHYSICS': _script_json(physics),
+        'FREEZE': _script_json(not (physics or hierarchical)),
+        'LAYOUT': _script_json(layout),
+        'NODE_CHUNKS': _script_json(_chunks([n.to_dict() for n in nodes], STREAM_CHUNK_SIZE)),
+        'EDGE_CHUNKS': _script_json(_chunks([e.to_dict() for e in edges], STREAM_CHUNK_SIZE)),
+    }
+    # One pass over the template, so placeholder-like text inside the data is left alone
+    html = re.sub(r"__([A-Z_]+?)__", lambda m: values[m.group(1)], _STREAM_TEMPLATE)
+    components.html(html, height=height + 10)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _layout_positions(node_ids, edges, scale):
+    """
+    Server-side spring layout so the browser can skip physics stabilization.
+    Cached per (node ids, edges, scale), so reruns over the same graph reuse it.
+    """
+    import networkx as nx
+    G = nx.Graph()
+    G.add_nodes_from(node_ids)
+    G.add_edges_from(edges)
+    return {n: (float(x), float(y)) for n, (x, y) in nx.spring_layout(G, seed=42, scale=scale).items()}
+
+def render_graph(data, height=500, layout="force"):
+    """Renders the interactive graph. `layout` is "force" or "hierarchical"."""
+    from streamlit_agraph import agraph, Node, Edge, Config
+
     nodes = []
     edges = []
+    hierarchical = layout == "hierarchical"
+    physics = not hierarchical and st.session_state.get('enable_physics', False)
     
-    # Auto Insurance Color Palette
-    type_colors = {
-        'Person': '#3498db',       # Blue
-        'Claim': '#9b59b6',        # Purple
-        'Shop': '#e67e22',         # Orange
-        'Doctor': '#2ecc71',       # Green
-        'Policy': '#34495e',       # Dark Grey
-        'Vehicle': '#95a5a6',      # Grey
-        'Phone': '#e74c3c',        # Red
-        'Address': '#f1c40f',      # Yellow
-        'Attorney': '#8e44ad',     # Violet
-    }
-
+    # Collapse nodes/edges repeated across overlapping paths before building agraph objects
+    seen_nodes, seen_edges = {}, set()
     for n in data['nodes']:
-        color = type_colors.get(n['type'], '#718096')
+        seen_nodes.setdefault(n['id'], n)
+    unique_edges = []
+    for e in data['edges']:
+        key = (e['source'], e['target'], e['type'])
+        if key in seen_edges: continue
+        seen_edges.add(key)
+        unique_edges.append(e)
+
+    # Large graphs skip the server-side layout (it grows super-linearly); vis.js
+    # stabilizes them once in the browser instead (see _render_streamed)
+    positions = {}
+    if not (physics or hierarchical) and len(seen_nodes) < STREAM_THRESHOLD:
+        positions = _layout_positions(
+            tuple(seen_nodes),
+            tuple((e['source'], e['target']) for e in unique_edges),
+            scale=height * 0.8
+        )
+
+    for n in seen_nodes.values():
+        color = _TYPE_COLORS.get(n['type'], '#718096')
         if n.get('is_fraud'): color = '#c0392b' # Dark Red for confirmed fraud
         if n.get('flagged'): color = '#d35400' # Burnt Orange for flagged entities
         
@@ -80,27 +257,30 @@ def render_graph(data, height=500):
         tooltip_lines = [f"📌 {n['label']}"]
         tooltip_lines.append(f"Type: {n['type']}")
         
-        # Display ROLE if available (New Data Structure)
-        if 'role' in props: tooltip_lines.append(f"👤 Role: {props['role']}")
-        
-        # Add specific properties if they exist
-        if 'amount' in props: tooltip_lines.append(f"💰 Amount: ${props['amount']:,}")
-        if 'tenure' in props: tooltip_lines.append(f"⏳ Tenure: {props['tenure']}")
-        if 'date' in props: tooltip_lines.append(f"📅 Date: {props['date']}")
+        # Add role and specific properties if they exist
+        for key, label, fmt in _TOOLTIP_KEYS:
+            value = props.get(key)
+            if value is not None: tooltip_lines.append(f"{label}: {fmt(value)}")
         
         # Add ID at the bottom
         tooltip_lines.append(f"ID: {n.get('id')}")
 
+        pos = {}
+        if n['id'] in positions:
+            x, y = positions[n['id']]
+            pos = {'x': x, 'y': y}
+
         nodes.append(Node(
             id=n['id'],
             label=n['label'],
             size=30 if n['type'] in ['Claim', 'Policy'] else 25,
             shape='dot',
             color=color,
-            title="\n".join(tooltip_lines)
+            title="\n".join(tooltip_lines),
+            **pos
         ))
 
-    for e in data['edges']:
+    for e in unique_edges:
         edges.append(Edge(
             source=e['source'],
             target=e['target'],
@@ -109,12 +289,18 @@ def render_graph(data, height=500):
             color='#bdc3c7'
         ))
 
+    if len(nodes) >= STREAM_THRESHOLD:
+        with st.container(border=True):
+            return _render_streamed(nodes, edges, height, physics, hierarchical)
+
     config = Config(
         width="100%",
         height=height,
         directed=True,
-        physics=True,
-        hierarchical=False,
+        physics=physics,
+        hierarchical=hierarchical,
+        direction=_HIERARCHICAL_OPTIONS['direction'],
+        sortMethod=_HIERARCHICAL_OPTIONS['sortMethod'],
     )
     
     with st.container(border=True):
@@ -123,136 +309,127 @@ def render_graph(data, height=500):
 # ==============================================================================
 # SCENARIO RENDERERS
 # ==============================================================================
+@lru_cache(maxsize=1)
+def _relational_tables():
+    """Static relational-view tables, built on first use (read-only, shared across reruns)."""
+    import pandas as pd
+    return {
+        'claims': pd.DataFrame([
+            {"Claim": "CLM-101", "Date": "2024-01-10", "Driver": "Driver A", "Injured": "Pass B, Pass C"},
+            {"Claim": "CLM-102", "Date": "2024-04-22", "Driver": "Driver D", "Injured": "Pass B, Pass E"},
+        ]),
+        'providers': pd.DataFrame([
+            {"Claim": "CLM-101", "Provider": "Elite Rehab Center"},
+            {"Claim": "CLM-102", "Provider": "Elite Rehab Center"},
+        ]),
+        'flags': pd.DataFrame([
+            {"Claim": "CLM-999", "Amount": "$25,000", "Tenure": "120 Mo", "Alert": "HIGH SEVERITY"},
+            {"Claim": "CLM-888", "Amount": "$25,000", "Tenure": "1 Mo", "Alert": "HIGH SEVERITY"}
+        ]),
+    }
+
+# --- Relational (SQL) side of each scenario ---
+
+def _render_scenario1_sql():
+    st.markdown("### 🏛️ The Relational (SQL) View")
+    st.info("SQL databases store claims as isolated rows. Finding 'Passenger B' across millions of rows requires expensive self-joins.")
+    
+    st.markdown("**Claims Table**")
+    st.table(_relational_tables()['claims'])
+    
+    st.markdown("**Provider Table**")
+    st.table(_relational_tables()['providers'])
+
+    st.warning("⚠️ The connection is buried. Driver A and Driver D look unrelated. Passenger B is just a name text field in many systems.")
 
-def render_scenario_1_discovery():
-    """Network Discovery Scenario."""
-    st.markdown("""
-    <div class="header-box">
+def _render_scenario2_sql():
+    st.markdown("### 🏛️ The Relational (SQL) View")
+    st.write("Two claims appear independent. Different policies, different vehicles.")
+    
+    st.markdown("**Claim A (Alice)**")
+    st.json({"ID": "CLM-A", "Policy": "POL-A", "Witness": "Bob"})
+    
+    st.markdown("**Claim B (Charlie)**")
+    st.json({"ID": "CLM-B", "Policy": "POL-B", "Claimant": "Charlie"})
+    
+    st.error("🚨 There is no database key linking 'Witness Bob' to 'Claimant Charlie'. The fraud is hidden in the unstructured relationship.")
+
+def _render_scenario3_sql():
+    st.markdown("### 🏛️ Rule-Based System (SQL)")
+    st.markdown("Traditional SIU systems flag claims based on static business rules (e.g., Amount > $20k).")
+    
+    st.markdown("**SIU Alert Queue**")
+    st.table(_relational_tables()['flags'])
+    st.error("🚨 Both claims are flagged. Investigators waste time reviewing the legitimate customer (CLM-999).")
+
+# --- Scenario specs ---
+# Each graph view is fetched live with `cypher`/`params`, or cut from the bundled
+# snapshot (the whole graph, or the `hops` neighbourhood of `center`).
+# Messages are (streamlit function name, text) pairs.
+
+_SCENARIOS = [
+    {
+        "id": 1,
+        "label": "1. Network Discovery",
+        "header": """
         <h2>1. Network Discovery: The "Recycled Passenger" Ring</h2>
         <p><strong>P&C Use Case:</strong> Detecting organized groups who stage accidents, recycling the same participants as passengers across multiple claims.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("""
-    <div class="story-box">
+        """,
+        "story": """
         <strong>📜 The Scenario:</strong><br>
         <strong>Accident #1 (Jan 2024):</strong> Driver A files a claim. Passengers B and C claim soft tissue injuries. Treated at <em>'Elite Rehab Center'</em>.<br>
         <strong>Accident #2 (Apr 2024):</strong> Driver D files a claim. <strong>Passenger B</strong> (from the first accident) is in the car again, along with new Passenger E. Also treated at <em>'Elite Rehab Center'</em>.
         <br><br>
         <strong>The Red Flag:</strong> It is statistically improbable for the same "Passenger B" to be in two injury-causing accidents with different drivers in 3 months, all using the same rehab center. Graph analysis exposes the <strong>"Recycled Passenger"</strong> pattern (Bowtie Topology) and links the Drivers via a shared burner phone.
-    </div>
-    """, unsafe_allow_html=True)
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown("### 🏛️ The Relational (SQL) View")
-        st.info("SQL databases store claims as isolated rows. Finding 'Passenger B' across millions of rows requires expensive self-joins.")
-        
-        st.markdown("**Claims Table**")
-        df_claims = pd.DataFrame([
-            {"Claim": "CLM-101", "Date": "2024-01-10", "Driver": "Driver A", "Injured": "Pass B, Pass C"},
-            {"Claim": "CLM-102", "Date": "2024-04-22", "Driver": "Driver D", "Injured": "Pass B, Pass E"},
-        ])
-        st.table(df_claims)
-        
-        st.markdown("**Provider Table**")
-        df_prov = pd.DataFrame([
-            {"Claim": "CLM-101", "Provider": "Elite Rehab Center"},
-            {"Claim": "CLM-102", "Provider": "Elite Rehab Center"},
-        ])
-        st.table(df_prov)
-
-        st.warning("⚠️ The connection is buried. Driver A and Driver D look unrelated. Passenger B is just a name text field in many systems.")
-
-    with col2:
-        st.markdown("### 🕸️ The Graph View")
-        st.success("The 'Bowtie' pattern is unmistakable. Passenger B bridges the two accidents, and the Drivers are linked by a hidden phone.")
-        
-        if st.button("🔄 Generate Ring Data"):
-            with st.spinner("Generating recycled passenger ring..."):
-                generate_scenario_data(1)
-                st.rerun()
-
-        # Fetch Data - Captures the Recycled Passenger, Claims, Drivers, and Facilitators
-        data = run_query("""
-        MATCH path=(c:Claim)-[*1..3]-(related)
-        WHERE c.id IN ['CLM-101', 'CLM-102']
-        RETURN path LIMIT 100
-        """)
-        
-        if data:
-            render_graph(data, height=500)
-            st.markdown("**Insight:** **Passenger B** is the nexus. **Elite Rehab** and **Lawyer Saul** facilitate both claims. **Driver A** and **Driver D** are colluding (Shared Phone).")
-        else:
-            st.warning("No data. Click 'Generate' above.")
-
-def render_scenario_2_latent():
-    """Latent Relationships Scenario."""
-    st.markdown("""
-    <div class="header-box">
+        """,
+        "sql_renderer": _render_scenario1_sql,
+        "graph_intro": ("success", "The 'Bowtie' pattern is unmistakable. Passenger B bridges the two accidents, and the Drivers are linked by a hidden phone."),
+        "generate": ("🔄 Generate Ring Data", "Generating recycled passenger ring..."),
+        "views": [
+            {
+                "cypher": Q_SCENARIO1,
+                "params": (('ids', ('CLM-101', 'CLM-102')),),
+                "height": 500,
+                "insight": ("markdown", "**Insight:** **Passenger B** is the nexus. **Elite Rehab** and **Lawyer Saul** facilitate both claims. **Driver A** and **Driver D** are colluding (Shared Phone)."),
+                "empty": "No data. Click 'Generate' above.",
+            },
+        ],
+    },
+    {
+        "id": 2,
+        "label": "2. Latent Relationships",
+        "header": """
         <h2>2. Latent Relationships: Witness Independence Verification</h2>
         <p><strong>P&C Use Case:</strong> Validating "Independent Witnesses" to rule out collusion or staged events.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("""
-    <div class="story-box">
+        """,
+        "story": """
         <strong>📜 The Scenario:</strong><br>
         <strong>Alice</strong> files a claim for a parking lot accident. A witness, <strong>Bob</strong>, provides a statement corroborating her version of events.
         To the adjuster, Bob appears to be an independent bystander.
         However, Graph analysis reveals a "Latent Link": Bob shares a mobile number or address history with <strong>Charlie</strong>, who is a known associate of Alice or a frequent claimant.
         This undisclosed relationship voids the witness's credibility and suggests a staged event.
-    </div>
-    """, unsafe_allow_html=True)
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown("### 🏛️ The Relational (SQL) View")
-        st.write("Two claims appear independent. Different policies, different vehicles.")
-        
-        st.markdown("**Claim A (Alice)**")
-        st.json({"ID": "CLM-A", "Policy": "POL-A", "Witness": "Bob"})
-        
-        st.markdown("**Claim B (Charlie)**")
-        st.json({"ID": "CLM-B", "Policy": "POL-B", "Claimant": "Charlie"})
-        
-        st.error("🚨 There is no database key linking 'Witness Bob' to 'Claimant Charlie'. The fraud is hidden in the unstructured relationship.")
-
-    with col2:
-        st.markdown("### 🕸️ The Graph View")
-        st.write("Graph traversal finds the **Shared Phone Number** linking the Witness of Claim A to the Claimant of Claim B.")
-        
-        if st.button("🔄 Generate Latent Data"):
-             with st.spinner("Planting hidden link..."):
-                generate_scenario_data(2)
-                st.rerun()
-
-        # Update Query to fetch broader context (Policies, Vehicles, Shops)
-        data = run_query("""
-        MATCH path = (root:Claim)-[*1..3]-(leaf)
-        WHERE root.id IN ['CLM-A', 'CLM-B']
-        RETURN path LIMIT 150
-        """)
-
-        if data:
-            render_graph(data, height=500)
-            st.success("✅ **Fraud Detected:** Witness Bob uses the same phone number as Charlie (Claimant B). This suggests collusion.")
-        else:
-            st.warning("No data. Click 'Generate' above.")
-
-def render_scenario_3_false_positives():
-    """False Positive Mitigation Scenario."""
-    st.markdown("""
-    <div class="header-box">
+        """,
+        "sql_renderer": _render_scenario2_sql,
+        "graph_intro": ("write", "Graph traversal finds the **Shared Phone Number** linking the Witness of Claim A to the Claimant of Claim B."),
+        "generate": ("🔄 Generate Latent Data", "Planting hidden link..."),
+        "views": [
+            {
+                "cypher": Q_SCENARIO2,
+                "params": (('ids', ('CLM-A', 'CLM-B')),),
+                "height": 500,
+                "insight": ("success", "✅ **Fraud Detected:** Witness Bob uses the same phone number as Charlie (Claimant B). This suggests collusion."),
+                "empty": "No data. Click 'Generate' above.",
+            },
+        ],
+    },
+    {
+        "id": 3,
+        "label": "3. False Positive Mitigation",
+        "header": """
         <h2>3. False Positive Mitigation: Early Tenure Claims Analysis</h2>
         <p><strong>P&C Use Case:</strong> Distinguishing "Application Fraud" (buying policy to claim) from legitimate "Bad Luck" for new business.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("""
-    <div class="story-box">
+        """,
+        "story": """
         <strong>📜 The Scenario:</strong><br>
         Two major claims just hit the desk, both for <strong>$25,000</strong> in severe damages.
         <ul>
@@ -260,74 +437,124 @@ def render_scenario_3_false_positives():
             <li><strong>Claim 888:</strong> Policy bound <strong>3 days ago</strong>. First payment. Vehicle towed to a non-network shop.</li>
         </ul>
         Legacy systems flag <strong>BOTH</strong> due to the high dollar amount. Graph analysis isolates the 10-year customer (Green/Safe) vs. the 3-day customer linked to a "Watchlist" shop (Red/Risk), allowing for Straight-Through-Processing (STP) of the legitimate claim.
-    </div>
-    """, unsafe_allow_html=True)
+        """,
+        "sql_renderer": _render_scenario3_sql,
+        "graph_intro": ("write", "Graph context immediately exonerates CLM-999 (Isolated, Long Tenure) and indicts CLM-888 (Connected to Fraud Ring)."),
+        "generate": ("🔄 Generate Context Data", "Generating context..."),
+        "views": [
+            {
+                "tab": "Claim CLM-999 (Legitimate)",
+                "cypher": Q_SCENARIO3_CLAIM,
+                "params": (('cid', 'CLM-999'),),
+                "center": 'CLM-999',
+                "hops": 2,
+                "height": 350,
+                "layout": "hierarchical",
+                "insight": ("success", "✅ **Recommendation: AUTO-APPROVE.** Long tenure policy, reputable repair shop, no connections to bad actors."),
+                "empty": "No data generated.",
+            },
+            {
+                "tab": "Claim CLM-888 (Risky)",
+                "cypher": Q_SCENARIO3_CLAIM,
+                "params": (('cid', 'CLM-888'),),
+                "center": 'CLM-888',
+                "hops": 2,
+                "height": 350,
+                "layout": "hierarchical",
+                "insight": ("error", "🚨 **Recommendation: INVESTIGATE.** New policy (1 mo), connected to 'Shady Body Shop' which is linked to past fraud."),
+                "empty": "No data generated.",
+            },
+        ],
+    },
+]
+
+def _fetch_view(scenario_id, view):
+    if _use_live():
+        # Per-session cache keyed by the process-wide write version, so switching
+        # stories is a dict lookup and a Generate in any session refetches
+        version = get_write_version()
+        cache = st.session_state.get('graph_cache')
+        if cache is None or cache['version'] != version:
+            cache = st.session_state['graph_cache'] = {'version': version}
+        key = (scenario_id, view["params"])
+        if key not in cache:
+            try:
+                cache[key] = _cached_query(view["cypher"], view["params"])
+            except _NoResult:  # e.g. no connection; retried on the next rerun
+                return None
+        return cache[key]
+    data = load_snapshot(scenario_id)
+    if view.get("center"):
+        return ego_subgraph(data, view["center"], hops=view["hops"])
+    return data
+
+def _render_view(scenario_id, view):
+    data = _fetch_view(scenario_id, view)
+    if data and data['nodes']:
+        render_graph(data, height=view["height"], layout=view.get("layout", "force"))
+        kind, text = view["insight"]
+        getattr(st, kind)(text)
+    else:
+        st.warning(view["empty"])
+
+@st.fragment
+def render_scenario(spec):
+    """Renders one demo story: header, story, SQL view and graph view(s)."""
+    st.markdown(f'<div class="header-box">{spec["header"]}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="story-box">{spec["story"]}</div>', unsafe_allow_html=True)
 
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("### 🏛️ Rule-Based System (SQL)")
-        st.markdown("Traditional SIU systems flag claims based on static business rules (e.g., Amount > $20k).")
-        
-        st.markdown("**SIU Alert Queue**")
-        df_flags = pd.DataFrame([
-            {"Claim": "CLM-999", "Amount": "$25,000", "Tenure": "120 Mo", "Alert": "HIGH SEVERITY"},
-            {"Claim": "CLM-888", "Amount": "$25,000", "Tenure": "1 Mo", "Alert": "HIGH SEVERITY"}
-        ])
-        st.table(df_flags)
-        st.error("🚨 Both claims are flagged. Investigators waste time reviewing the legitimate customer (CLM-999).")
+        spec["sql_renderer"]()
 
     with col2:
         st.markdown("### 🕸️ The Graph View")
-        st.write("Graph context immediately exonerates CLM-999 (Isolated, Long Tenure) and indicts CLM-888 (Connected to Fraud Ring).")
-        
-        if st.button("🔄 Generate Context Data"):
-             with st.spinner("Generating context..."):
-                generate_scenario_data(3)
-                st.rerun()
-
-        # Visualization
-        c_a, c_b = st.tabs(["Claim CLM-999 (Legitimate)", "Claim CLM-888 (Risky)"])
+        kind, text = spec["graph_intro"]
+        getattr(st, kind)(text)
         
-        with c_a:
-            data_legit = run_query("MATCH path=(c:Claim {id:'CLM-999'})-[*1..2]-(n) RETURN path")
-            if data_legit:
-                render_graph(data_legit, height=350)
-                st.success("✅ **Recommendation: AUTO-APPROVE.** Long tenure policy, reputable repair shop, no connections to bad actors.")
-            else:
-                st.warning("No data generated.")
-                
-        with c_b:
-            data_fraud = run_query("MATCH path=(c:Claim {id:'CLM-888'})-[*1..2]-(n) RETURN path")
-            if data_fraud:
-                render_graph(data_fraud, height=350)
-                st.error("🚨 **Recommendation: INVESTIGATE.** New policy (1 mo), connected to 'Shady Body Shop' which is linked to past fraud.")
-            else:
-                st.warning("No data generated.")
+        button_label, spinner_text = spec["generate"]
+        if _use_live() and st.button(button_label):
+            with st.spinner(spinner_text):
+                from data_generator import generate_scenario_data
+                generate_scenario_data(spec["id"])
+                # Generating wipes the whole database, so every scenario's graphs are
+                # stale (session caches follow via the bumped write version)
+                _cached_query.clear()
+                st.rerun(scope="fragment")
+
+        views = spec["views"]
+        if len(views) == 1:
+            _render_view(spec["id"], views[0])
+        else:
+            for tab, view in zip(st.tabs([v["tab"] for v in views]), views):
+                with tab:
+                    _render_view(spec["id"], view)
 
 # ==============================================================================
 # MAIN APP LOGIC
 # ==============================================================================
 
 def main():
-    if not is_connected():
-        init_driver()
-        
     st.sidebar.title("🔍 Investigation Scenarios")
-    scenario = st.sidebar.radio(
+    st.sidebar.toggle("Use live Neo4j", value=False, key="use_live_neo4j",
+                      help="Off serves the canned scenarios from bundled snapshots. On queries (and lets you regenerate) the live database.")
+    if _use_live():
+        init_driver()
+
+    idx = st.sidebar.radio(
         "Select a Demo Story:",
-        ["1. Network Discovery", "2. Latent Relationships", "3. False Positive Mitigation"]
+        range(len(_SCENARIOS)),
+        format_func=lambda i: _SCENARIOS[i]["label"]
     )
     
+    st.sidebar.checkbox("Enable physics", value=False, key="enable_physics",
+                        help="Animate the force-directed layout. Off renders a precomputed layout instantly.")
+
     st.sidebar.markdown("---")
     st.sidebar.info("This demo generates synthetic Auto Insurance data (Policies, Claims, Vehicles) to demonstrate Graph DB advantages.")
 
-    if "Network Discovery" in scenario:
-        render_scenario_1_discovery()
-    elif "Latent Relationships" in scenario:
-        render_scenario_2_latent()
-    elif "False Positive" in scenario:
-        render_scenario_3_false_positives()
+    render_scenario(_SCENARIOS[idx])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from neo4j_utils import run_query_transaction
+from snapshot_utils import write_snapshot
 import random
 
 def generate_scenario_data(scenario_id):
@@ -8,134 +9,176 @@ def generate_scenario_data(scenario_id):
     # Clean database for clean demo slate
     run_query_transaction(["MATCH (n) DETACH DELETE n"])
 
-    if scenario_id == 1:
-        _create_discovery_ring()
-    elif scenario_id == 2:
-        _create_latent_link()
-    elif scenario_id == 3:
-        _create_false_positive_context()
+    spec = _SCENARIO_SPECS.get(scenario_id)
+    if spec:
+        run_query_transaction([_create_statement(*spec())])
 
-def _create_discovery_ring():
+def build_snapshot(scenario_id):
+    """
+    Builds the render-ready {nodes, edges} graph for a scenario directly from
+    its spec, in the same shape `run_query` returns.
+    """
+    nodes, rels = _SCENARIO_SPECS[scenario_id]()
+    return {
+        'nodes': [{
+            'id': props['id'],
+            'label': props.get('label', props['id']),
+            'type': label,
+            'is_fraud': props.get('is_fraud', False),
+            'flagged': props.get('flagged', False),
+            'properties': {k: props.get(k) for k in ('role', 'amount', 'tenure', 'date')}
+        } for label, props in nodes],
+        'edges': [{'source': src, 'target': dst, 'type': rel_type} for src, rel_type, dst in rels]
+    }
+
+def _create_statement(nodes, rels):
+    """
+    Compiles a scenario spec into a single CREATE statement. Every node is bound
+    to a variable in the same clause, so relationships are created directly from
+    those variables without MATCHing their endpoints. Properties are passed as
+    parameters, keeping the statement text fixed per scenario.
+    """
+    var = {props['id']: f"n{i}" for i, (_, props) in enumerate(nodes)}
+    patterns = [f"({var[props['id']]}:{label} ${var[props['id']]})" for label, props in nodes]
+    patterns += [f"({var[src]})-[:{rel_type}]->({var[dst]})" for src, rel_type, dst in rels]
+    params = {var[props['id']]: props for _, props in nodes}
+    return "CREATE " + ",\n       ".join(patterns), params
+
+def _discovery_ring_spec():
     """
     Scenario 1: The 'Recycled Passenger' Ring.
     A sophisticated ring where 'passengers' cycle through staged accidents.
     Topology: Two accident clusters sharing a Passenger and a Service Nexus.
     """
-    queries = [
+    nodes = [
         # --- The Facilitators (The Hubs) ---
-        "CREATE (:Doctor {id:'DOC-X', label:'Elite Rehab Center', type:'Doctor', flagged:true})",
-        "CREATE (:Attorney {id:'ATT-Y', label:'Lawyer Saul', type:'Attorney', flagged:true})",
-        
+        ('Doctor', {'id':'DOC-X', 'label':'Elite Rehab Center', 'type':'Doctor', 'flagged':True}),
+        ('Attorney', {'id':'ATT-Y', 'label':'Lawyer Saul', 'type':'Attorney', 'flagged':True}),
+
         # --- Accident 1: The 'Setup' ---
-        "CREATE (:Claim {id:'CLM-101', label:'Accident #1 ($45k)', type:'Claim', amount:45000, date:'2024-01-10'})",
-        "CREATE (:Person {id:'Driver-A', label:'Driver A', role:'Organizer', type:'Person'})",
-        
+        ('Claim', {'id':'CLM-101', 'label':'Accident #1 ($45k)', 'type':'Claim', 'amount':45000, 'date':'2024-01-10'}),
+        ('Person', {'id':'Driver-A', 'label':'Driver A', 'role':'Organizer', 'type':'Person'}),
+
         # The Recycled Passenger (The key node)
-        "CREATE (:Person {id:'Pass-B', label:'Passenger B', role:'Recycled Passenger', type:'Person', flagged:true})",
-        "CREATE (:Person {id:'Pass-C', label:'Passenger C', role:'Passenger', type:'Person'})",
-        
-        "MATCH (d:Person {id:'Driver-A'}), (c:Claim {id:'CLM-101'}) CREATE (d)-[:FILED]->(c)",
-        "MATCH (p:Person {id:'Pass-B'}), (c:Claim {id:'CLM-101'}) CREATE (p)-[:PASSENGER_IN]->(c)",
-        "MATCH (p:Person {id:'Pass-C'}), (c:Claim {id:'CLM-101'}) CREATE (p)-[:PASSENGER_IN]->(c)",
-        
-        # Treatment & Legal for Acc 1
-        "MATCH (c:Claim {id:'CLM-101'}), (d:Doctor {id:'DOC-X'}) CREATE (c)-[:TREATED_AT]->(d)",
-        "MATCH (c:Claim {id:'CLM-101'}), (a:Attorney {id:'ATT-Y'}) CREATE (c)-[:REPRESENTED_BY]->(a)",
+        ('Person', {'id':'Pass-B', 'label':'Passenger B', 'role':'Recycled Passenger', 'type':'Person', 'flagged':True}),
+        ('Person', {'id':'Pass-C', 'label':'Passenger C', 'role':'Passenger', 'type':'Person'}),
 
         # --- Accident 2: The 'Copycat' (3 months later) ---
-        "CREATE (:Claim {id:'CLM-102', label:'Accident #2 ($38k)', type:'Claim', amount:38000, date:'2024-04-22'})",
-        "CREATE (:Person {id:'Driver-D', label:'Driver D', role:'Organizer', type:'Person'})",
-        "CREATE (:Person {id:'Pass-E', label:'Passenger E', role:'Passenger', type:'Person'})",
-        
-        "MATCH (d:Person {id:'Driver-D'}), (c:Claim {id:'CLM-102'}) CREATE (d)-[:FILED]->(c)",
-        
+        ('Claim', {'id':'CLM-102', 'label':'Accident #2 ($38k)', 'type':'Claim', 'amount':38000, 'date':'2024-04-22'}),
+        ('Person', {'id':'Driver-D', 'label':'Driver D', 'role':'Organizer', 'type':'Person'}),
+        ('Person', {'id':'Pass-E', 'label':'Passenger E', 'role':'Passenger', 'type':'Person'}),
+
+        # --- The Hidden Link (The Organizers share a burner phone) ---
+        ('Phone', {'id':'PH-RING', 'label':'Burner Phone', 'type':'Phone', 'flagged':True}),
+    ]
+    rels = [
+        ('Driver-A', 'FILED', 'CLM-101'),
+        ('Pass-B', 'PASSENGER_IN', 'CLM-101'),
+        ('Pass-C', 'PASSENGER_IN', 'CLM-101'),
+
+        # Treatment & Legal for Acc 1
+        ('CLM-101', 'TREATED_AT', 'DOC-X'),
+        ('CLM-101', 'REPRESENTED_BY', 'ATT-Y'),
+
+        ('Driver-D', 'FILED', 'CLM-102'),
+
         # RECYCLED PASSENGER B appears again in a different car!
-        "MATCH (p:Person {id:'Pass-B'}), (c:Claim {id:'CLM-102'}) CREATE (p)-[:PASSENGER_IN]->(c)",
-        "MATCH (p:Person {id:'Pass-E'}), (c:Claim {id:'CLM-102'}) CREATE (p)-[:PASSENGER_IN]->(c)",
-        
+        ('Pass-B', 'PASSENGER_IN', 'CLM-102'),
+        ('Pass-E', 'PASSENGER_IN', 'CLM-102'),
+
         # Same Facilitators
-        "MATCH (c:Claim {id:'CLM-102'}), (d:Doctor {id:'DOC-X'}) CREATE (c)-[:TREATED_AT]->(d)",
-        "MATCH (c:Claim {id:'CLM-102'}), (a:Attorney {id:'ATT-Y'}) CREATE (c)-[:REPRESENTED_BY]->(a)",
-        
-        # --- The Hidden Link (The Organizers share a burner phone) ---
-        "CREATE (:Phone {id:'PH-RING', label:'Burner Phone', type:'Phone', flagged:true})",
-        "MATCH (d1:Person {id:'Driver-A'}), (ph:Phone {id:'PH-RING'}) CREATE (d1)-[:HAS_PHONE]->(ph)",
-        "MATCH (d2:Person {id:'Driver-D'}), (ph:Phone {id:'PH-RING'}) CREATE (d2)-[:HAS_PHONE]->(ph)"
+        ('CLM-102', 'TREATED_AT', 'DOC-X'),
+        ('CLM-102', 'REPRESENTED_BY', 'ATT-Y'),
+
+        # Both Organizers use the burner phone
+        ('Driver-A', 'HAS_PHONE', 'PH-RING'),
+        ('Driver-D', 'HAS_PHONE', 'PH-RING'),
     ]
-    run_query_transaction(queries)
+    return nodes, rels
 
-def _create_latent_link():
+def _latent_link_spec():
     """
     Scenario 2: Latent Relationships (The 'Compromised Witness').
     Creates a fuller graph context with vehicles, repair shops, and doctors.
     """
-    queries = [
+    nodes = [
         # --- Cluster A: Alice's Accident ---
-        "CREATE (:Person {id:'Alice', label:'Alice', role:'Claimant', type:'Person'})",
-        "CREATE (:Policy {id:'POL-A', label:'Policy #A-991', type:'Policy', tenure:'3 Years'})",
-        "CREATE (:Vehicle {id:'VEH-A', label:'2020 Ford Fusion', type:'Vehicle'})",
-        "CREATE (:Claim {id:'CLM-A', label:'Claim #A-22', type:'Claim', amount:4500, date:'2024-03-10'})",
-        
-        "MATCH (p:Person {id:'Alice'}), (pol:Policy {id:'POL-A'}) CREATE (p)-[:HOLDER]->(pol)",
-        "MATCH (pol:Policy {id:'POL-A'}), (v:Vehicle {id:'VEH-A'}) CREATE (pol)-[:COVERS]->(v)",
-        "MATCH (p:Person {id:'Alice'}), (c:Claim {id:'CLM-A'}) CREATE (p)-[:FILED]->(c)",
-        "MATCH (c:Claim {id:'CLM-A'}), (v:Vehicle {id:'VEH-A'}) CREATE (c)-[:INVOLVES]->(v)",
-        
-        "CREATE (:Shop {id:'SHOP-A', label:'Downtown Auto', type:'Shop'})",
-        "MATCH (c:Claim {id:'CLM-A'}), (s:Shop {id:'SHOP-A'}) CREATE (c)-[:REPAIRED_AT]->(s)",
-
-        "CREATE (:Person {id:'Wit-Bob', label:'Bob', role:'Witness', type:'Person'})",
-        "MATCH (w:Person {id:'Wit-Bob'}), (c:Claim {id:'CLM-A'}) CREATE (w)-[:WITNESSED]->(c)",
-        
+        ('Person', {'id':'Alice', 'label':'Alice', 'role':'Claimant', 'type':'Person'}),
+        ('Policy', {'id':'POL-A', 'label':'Policy #A-991', 'type':'Policy', 'tenure':'3 Years'}),
+        ('Vehicle', {'id':'VEH-A', 'label':'2020 Ford Fusion', 'type':'Vehicle'}),
+        ('Claim', {'id':'CLM-A', 'label':'Claim #A-22', 'type':'Claim', 'amount':4500, 'date':'2024-03-10'}),
+        ('Shop', {'id':'SHOP-A', 'label':'Downtown Auto', 'type':'Shop'}),
+        ('Person', {'id':'Wit-Bob', 'label':'Bob', 'role':'Witness', 'type':'Person'}),
+
         # --- Cluster B: Charlie's Accident ---
-        "CREATE (:Person {id:'Charlie', label:'Charlie', role:'Claimant', type:'Person'})",
-        "CREATE (:Policy {id:'POL-B', label:'Policy #B-772', type:'Policy', tenure:'6 Months'})",
-        "CREATE (:Vehicle {id:'VEH-B', label:'2016 Chevy Malibu', type:'Vehicle'})",
-        "CREATE (:Claim {id:'CLM-B', label:'Claim #B-44', type:'Claim', amount:5200, date:'2024-04-05'})",
-        
-        "MATCH (p:Person {id:'Charlie'}), (pol:Policy {id:'POL-B'}) CREATE (p)-[:HOLDER]->(pol)",
-        "MATCH (pol:Policy {id:'POL-B'}), (v:Vehicle {id:'VEH-B'}) CREATE (pol)-[:COVERS]->(v)",
-        "MATCH (p:Person {id:'Charlie'}), (c:Claim {id:'CLM-B'}) CREATE (p)-[:FILED]->(c)",
-        "MATCH (c:Claim {id:'CLM-B'}), (v:Vehicle {id:'VEH-B'}) CREATE (c)-[:INVOLVES]->(v)",
-        
-        "CREATE (:Doctor {id:'DOC-B', label:'Metro Health', type:'Doctor'})",
-        "MATCH (c:Claim {id:'CLM-B'}), (d:Doctor {id:'DOC-B'}) CREATE (c)-[:TREATED_AT]->(d)",
-        
+        ('Person', {'id':'Charlie', 'label':'Charlie', 'role':'Claimant', 'type':'Person'}),
+        ('Policy', {'id':'POL-B', 'label':'Policy #B-772', 'type':'Policy', 'tenure':'6 Months'}),
+        ('Vehicle', {'id':'VEH-B', 'label':'2016 Chevy Malibu', 'type':'Vehicle'}),
+        ('Claim', {'id':'CLM-B', 'label':'Claim #B-44', 'type':'Claim', 'amount':5200, 'date':'2024-04-05'}),
+        ('Doctor', {'id':'DOC-B', 'label':'Metro Health', 'type':'Doctor'}),
+
+        # --- The Latent Link ---
+        ('Phone', {'id':'PH-555', 'label':'555-0199', 'type':'Phone', 'flagged':True}),
+    ]
+    rels = [
+        # --- Cluster A ---
+        ('Alice', 'HOLDER', 'POL-A'),
+        ('POL-A', 'COVERS', 'VEH-A'),
+        ('Alice', 'FILED', 'CLM-A'),
+        ('CLM-A', 'INVOLVES', 'VEH-A'),
+        ('CLM-A', 'REPAIRED_AT', 'SHOP-A'),
+        ('Wit-Bob', 'WITNESSED', 'CLM-A'),
+
+        # --- Cluster B ---
+        ('Charlie', 'HOLDER', 'POL-B'),
+        ('POL-B', 'COVERS', 'VEH-B'),
+        ('Charlie', 'FILED', 'CLM-B'),
+        ('CLM-B', 'INVOLVES', 'VEH-B'),
+        ('CLM-B', 'TREATED_AT', 'DOC-B'),
+
         # --- The Latent Link ---
-        "CREATE (:Phone {id:'PH-555', label:'555-0199', type:'Phone', flagged:true})",
-        "MATCH (w:Person {id:'Wit-Bob'}), (ph:Phone {id:'PH-555'}) CREATE (w)-[:HAS_PHONE]->(ph)",
-        "MATCH (p:Person {id:'Charlie'}), (ph:Phone {id:'PH-555'}) CREATE (p)-[:HAS_PHONE]->(ph)"
+        ('Wit-Bob', 'HAS_PHONE', 'PH-555'),
+        ('Charlie', 'HAS_PHONE', 'PH-555'),
     ]
-    run_query_transaction(queries)
+    return nodes, rels
 
-def _create_false_positive_context():
+def _false_positive_spec():
     """
     Scenario 3: False Positive Mitigation (Contextual Analysis).
     """
-    queries = [
+    nodes = [
         # 1. The False Positive (Legitimate High Value Claim)
-        "CREATE (:Person {id:'L-User', label:'Loyal Customer', role:'Insured', type:'Person'})",
-        "CREATE (:Policy {id:'POL-L', label:'Policy (10 Yrs)', type:'Policy', tenure:'120 Months'})",
-        "CREATE (:Claim {id:'CLM-999', label:'Major Accident ($25k)', type:'Claim', amount:25000})",
-        
-        "MATCH (p:Person {id:'L-User'}), (pol:Policy {id:'POL-L'}) CREATE (p)-[:HOLDER]->(pol)",
-        "MATCH (p:Person {id:'L-User'}), (c:Claim {id:'CLM-999'}) CREATE (p)-[:FILED]->(c)",
-        
-        "CREATE (:Shop {id:'S-Dealer', label:'Official Dealer', type:'Shop'})",
-        "MATCH (c:Claim {id:'CLM-999'}), (s:Shop {id:'S-Dealer'}) CREATE (c)-[:REPAIRED_AT]->(s)",
+        ('Person', {'id':'L-User', 'label':'Loyal Customer', 'role':'Insured', 'type':'Person'}),
+        ('Policy', {'id':'POL-L', 'label':'Policy (10 Yrs)', 'type':'Policy', 'tenure':'120 Months'}),
+        ('Claim', {'id':'CLM-999', 'label':'Major Accident ($25k)', 'type':'Claim', 'amount':25000}),
+        ('Shop', {'id':'S-Dealer', 'label':'Official Dealer', 'type':'Shop'}),
 
         # 2. The True Positive (Fraud High Value Claim)
-        "CREATE (:Person {id:'F-User', label:'New Customer', role:'Insured', type:'Person'})",
-        "CREATE (:Policy {id:'POL-F', label:'Policy (1 Mo)', type:'Policy', tenure:'1 Month'})",
-        "CREATE (:Claim {id:'CLM-888', label:'Major Accident ($25k)', type:'Claim', amount:25000})",
-        
-        "MATCH (p:Person {id:'F-User'}), (pol:Policy {id:'POL-F'}) CREATE (p)-[:HOLDER]->(pol)",
-        "MATCH (p:Person {id:'F-User'}), (c:Claim {id:'CLM-888'}) CREATE (p)-[:FILED]->(c)",
-        
-        "CREATE (:Shop {id:'S-Shady', label:'Shady Body Shop', type:'Shop', flagged:true})",
-        "MATCH (c:Claim {id:'CLM-888'}), (s:Shop {id:'S-Shady'}) CREATE (c)-[:REPAIRED_AT]->(s)",
-        
-        "CREATE (:Claim {id:'CLM-OLD', label:'Past Fraud Claim', type:'Claim', is_fraud:true})",
-        "MATCH (c:Claim {id:'CLM-OLD'}), (s:Shop {id:'S-Shady'}) CREATE (c)-[:REPAIRED_AT]->(s)"
+        ('Person', {'id':'F-User', 'label':'New Customer', 'role':'Insured', 'type':'Person'}),
+        ('Policy', {'id':'POL-F', 'label':'Policy (1 Mo)', 'type':'Policy', 'tenure':'1 Month'}),
+        ('Claim', {'id':'CLM-888', 'label':'Major Accident ($25k)', 'type':'Claim', 'amount':25000}),
+        ('Shop', {'id':'S-Shady', 'label':'Shady Body Shop', 'type':'Shop', 'flagged':True}),
+        ('Claim', {'id':'CLM-OLD', 'label':'Past Fraud Claim', 'type':'Claim', 'is_fraud':True}),
     ]
-    run_query_transaction(queries)
\ No newline at end of file
+    rels = [
+        ('L-User', 'HOLDER', 'POL-L'),
+        ('L-User', 'FILED', 'CLM-999'),
+        ('CLM-999', 'REPAIRED_AT', 'S-Dealer'),
+
+        ('F-User', 'HOLDER', 'POL-F'),
+        ('F-User', 'FILED', 'CLM-888'),
+        ('CLM-888', 'REPAIRED_AT', 'S-Shady'),
+        ('CLM-OLD', 'REPAIRED_AT', 'S-Shady'),
+    ]
+    return nodes, rels
+
+_SCENARIO_SPECS = {
+    1: _discovery_ring_spec,
+    2: _latent_link_spec,
+    3: _false_positive_spec,
+}
+
+if __name__ == "__main__":
+    # Regenerate the bundled snapshots/ files after editing a scenario spec
+    for sid in _SCENARIO_SPECS:
+        write_snapshot(sid, build_snapshot(sid))
\ No newline at end of file
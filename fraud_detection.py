@@ -4,79 +4,321 @@ Fraud Detection Algorithms - Native Python Implementation
 These algorithms replace Neo4j GDS functions for AuraDB Free Tier compatibility.
 """
 
+import streamlit as st
+import numpy as np
+import pandas as pd
 import networkx as nx
-from collections import defaultdict
-from neo4j_utils import run_query
+import igraph as ig
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from concurrent.futures import ThreadPoolExecutor
+from neo4j import READ_ACCESS
+from neo4j.exceptions import ClientError
+from neo4j_utils import run_query, stream_query, driver_or_none, open_session, get_write_version
+
+# Fraud neighbourhoods rarely span more than 3 hops; bounding Brandes' BFS here
+# keeps each source's work local instead of O(V+E).
+BETWEENNESS_CUTOFF = 3
+
+# (version_key, G) of the most recently built graph, for lookups that should
+# reuse it without triggering a rebuild
+_latest_graph = None
+
+
+def graph_version():
+    """
+    Cheap fingerprint of the database contents: node/relationship counts (both
+    answered from the count store, without touching nodes) and this process's
+    write counter.
+    """
+    result = run_query("""
+    CALL { MATCH (n) RETURN count(n) as node_count }
+    CALL { MATCH ()-[r]->() RETURN count(r) as rel_count }
+    RETURN node_count, rel_count
+    """)
+    row = result[0] if result else {}
+    return (row.get('node_count'), row.get('rel_count'), get_write_version())
 
 
 def build_networkx_graph():
     """
     Build a NetworkX graph from Neo4j data for algorithm processing.
+    Reuses the previously built graph while the database is unchanged; treat it as read-only.
     """
+    return _build_networkx_graph_cached(graph_version())
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _build_networkx_graph_cached(version_key):
     G = nx.Graph()
     
-    # Get all nodes
-    nodes_query = """
+    # Fetch all nodes and relationships in a single round-trip, streamed so the
+    # graph is built while records are still arriving. Only scalars are fetched:
+    # those the algorithms use plus the display properties (node_properties), all
+    # from the same snapshot so they match this version_key.
+    graph_query = """
     MATCH (n)
-    RETURN n.id as id, labels(n)[0] as label, n.name as name, 
-           n.flagged as flagged, n.ring_id as ring_id, n.is_fraudulent as is_fraud
+    RETURN 'node' as kind, n.id as id, labels(n)[0] as label,
+           n.flagged as flagged, n.is_fraudulent as is_fraud,
+           n.name as name, n.amount as amount, n.ring_id as ring_id,
+           null as source, null as target, null as rel_type
+    UNION ALL
+    MATCH (a)-[r]->(b)
+    RETURN 'rel' as kind, null as id, null as label,
+           null as flagged, null as is_fraud,
+           null as name, null as amount, null as ring_id,
+           a.id as source, b.id as target, type(r) as rel_type
     """
-    nodes = run_query(nodes_query)
+    # Node scalars go straight into parallel arrays in arrival order
+    index = {}
+    node_ids, labels, flagged, is_fraud = [], [], [], []
+    names, amounts, ring_ids = [], [], []
+    edges = []
+    rel_src, rel_dst, rel_types = [], [], []
     
-    for node in nodes:
-        G.add_node(node['id'], 
-                   label=node['label'],
-                   name=node.get('name') or node['id'], # Fix for None names
-                   flagged=node.get('flagged', False),
-                   ring_id=node.get('ring_id'),
-                   is_fraud=node.get('is_fraud', False))
+    def add_node(node_id, label=None, is_flagged=False, fraud=False, name=None, amount=None, ring_id=None):
+        index[node_id] = len(node_ids)
+        node_ids.append(node_id)
+        labels.append(label)
+        flagged.append(bool(is_flagged))
+        is_fraud.append(bool(fraud))
+        names.append(name or node_id)
+        amounts.append(amount)
+        ring_ids.append(ring_id)
     
-    # Get all relationships
-    rels_query = """
-    MATCH (a)-[r]->(b)
-    RETURN a.id as source, b.id as target, type(r) as rel_type
-    """
-    rels = run_query(rels_query)
+    for row in stream_query(graph_query):
+        if row['kind'] == 'node':
+            if row['id'] not in index:
+                add_node(row['id'], row['label'], row['flagged'], row['is_fraud'],
+                         row['name'], row['amount'], row['ring_id'])
+        elif row['source'] and row['target']:
+            for endpoint in (row['source'], row['target']):
+                if endpoint not in index:
+                    add_node(endpoint)
+            edges.append((row['source'], row['target'], {'rel_type': row['rel_type']}))
+            rel_src.append(index[row['source']])
+            rel_dst.append(index[row['target']])
+            rel_types.append(row['rel_type'])
+    
+    G.add_nodes_from(
+        (n, {'label': label, 'flagged': f, 'is_fraud': fraud})
+        for n, label, f, fraud in zip(node_ids, labels, flagged, is_fraud)
+    )
+    G.add_edges_from(edges)
+    G.graph['node_ids'] = node_ids
+    G.graph['node_arrays'] = {
+        'index': index,
+        'flagged': np.array(flagged, dtype=bool),
+        'is_fraud': np.array(is_fraud, dtype=bool),
+        'labels': np.array([label or 'Unknown' for label in labels], dtype=object),
+    }
+    G.graph['node_attr_flagged'] = G.graph['node_arrays']['flagged']
+    G.graph['node_properties'] = {'name': names, 'amount': amounts, 'ring_id': ring_ids}
+    # Directed relationships as stored (G itself merges parallel/reverse edges)
+    G.graph['relationships'] = (np.array(rel_src, dtype=np.int32), np.array(rel_dst, dtype=np.int32),
+                                np.array(rel_types, dtype=object))
     
-    for rel in rels:
-        if rel['source'] and rel['target']:
-            G.add_edge(rel['source'], rel['target'], rel_type=rel['rel_type'])
+    # Vectorized node/edge attributes, CSR adjacency for ego lookups and a
+    # compiled (C core) mirror of the topology for the heavy graph algorithms
+    node_arrays(G)
+    edge_arrays(G)
+    adjacency(G)
+    to_igraph(G)
     
+    global _latest_graph
+    _latest_graph = (version_key, G)
     return G
 
 
+def node_arrays(G: nx.Graph):
+    """
+    Structure-of-arrays view of G's node attributes, indexed by a compact node
+    index (`index` maps node id -> position in `node_ids`). Cached on G.graph.
+    """
+    if 'node_arrays' not in G.graph:
+        node_ids = list(G.nodes())
+        attrs = [G.nodes[n] for n in node_ids]
+        G.graph['node_ids'] = node_ids
+        G.graph['node_arrays'] = {
+            'index': {n: i for i, n in enumerate(node_ids)},
+            'flagged': np.fromiter((bool(a.get('flagged')) for a in attrs), dtype=bool, count=len(attrs)),
+            'is_fraud': np.fromiter((bool(a.get('is_fraud')) for a in attrs), dtype=bool, count=len(attrs)),
+            'labels': np.array([a.get('label') or 'Unknown' for a in attrs], dtype=object),
+        }
+        G.graph['node_attr_flagged'] = G.graph['node_arrays']['flagged']
+    return G.graph['node_arrays']
+
+
+def node_properties(G: nx.Graph):
+    """
+    Display properties (name, amount, ring_id) as lists aligned with node_ids;
+    names fall back to the id. Graphs built from the database carry them from
+    the build. Cached on G.graph.
+    """
+    if 'node_properties' not in G.graph:
+        node_arrays(G)
+        props = [G.nodes[n] for n in G.graph['node_ids']]
+        G.graph['node_properties'] = {
+            'name': [p.get('name') or n for n, p in zip(G.graph['node_ids'], props)],
+            'amount': [p.get('amount') for p in props],
+            'ring_id': [p.get('ring_id') for p in props],
+        }
+    return G.graph['node_properties']
+
+
+def edge_arrays(G: nx.Graph):
+    """
+    Edge endpoints as parallel int32 arrays over the node_arrays index
+    (each undirected edge stored once). Cached on G.graph as edge_src/edge_dst.
+    """
+    if 'edge_src' not in G.graph:
+        idx = node_arrays(G)['index']
+        m = G.number_of_edges()
+        src = np.empty(m, dtype=np.int32)
+        dst = np.empty(m, dtype=np.int32)
+        for i, (a, b) in enumerate(G.edges()):
+            src[i] = idx[a]
+            dst[i] = idx[b]
+        G.graph['edge_src'] = src
+        G.graph['edge_dst'] = dst
+    return G.graph['edge_src'], G.graph['edge_dst']
+
+
+def community_index(community, G: nx.Graph):
+    """Compact node indices of a community, for gathers into the node_arrays."""
+    index = node_arrays(G)['index']
+    return np.fromiter((index[n] for n in community), dtype=np.int32, count=len(community))
+
+
+def to_csr(G: nx.Graph):
+    """Sparse adjacency of G over the node_arrays index (each edge stored once). Cached on G.graph."""
+    if 'csr' not in G.graph:
+        n = len(node_arrays(G)['index'])
+        src, dst = edge_arrays(G)
+        G.graph['csr'] = csr_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+    return G.graph['csr']
+
+
+def adjacency(G: nx.Graph):
+    """
+    Symmetric CSR adjacency (indptr, indices) over the node_arrays index, for
+    neighbourhood walks. Cached on G.graph.
+    """
+    if 'indptr' not in G.graph:
+        n = len(node_arrays(G)['index'])
+        src, dst = edge_arrays(G)
+        adj = csr_matrix((np.ones(2 * len(src), dtype=np.int8),
+                          (np.concatenate((src, dst)), np.concatenate((dst, src)))), shape=(n, n))
+        G.graph['indptr'] = adj.indptr
+        G.graph['indices'] = adj.indices
+    return G.graph['indptr'], G.graph['indices']
+
+
+def ego_node_indices(G: nx.Graph, center_idx: int, hops: int, limit: int):
+    """
+    Node indices within `hops` of `center_idx`, in BFS order and capped at
+    `limit` nodes. Each level is expanded in one vectorized gather over the CSR.
+    """
+    indptr, indices = adjacency(G)
+    visited = np.zeros(len(indptr) - 1, dtype=bool)
+    visited[center_idx] = True
+    frontier = np.array([center_idx], dtype=np.int32)
+    found = [frontier]
+    count = 1
+    
+    for _ in range(hops):
+        if count >= limit or not len(frontier):
+            break
+        starts = indptr[frontier]
+        lengths = indptr[frontier + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            break
+        # Positions of every neighbour of the frontier, concatenated
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        nxt = np.unique(indices[positions])
+        nxt = nxt[~visited[nxt]][:limit - count]
+        visited[nxt] = True
+        found.append(nxt)
+        count += len(nxt)
+        frontier = nxt
+    
+    return np.concatenate(found)
+
+
+def relationship_arrays(G: nx.Graph):
+    """
+    Directed relationships as (source index, target index, type) arrays. Graphs
+    built from the database keep every stored relationship; otherwise G's edges
+    are used. Cached on G.graph.
+    """
+    if 'relationships' not in G.graph:
+        src, dst = edge_arrays(G)
+        types = np.array([d.get('rel_type') for _, _, d in G.edges(data=True)], dtype=object)
+        G.graph['relationships'] = (src, dst, types)
+    return G.graph['relationships']
+
+
+def to_igraph(G: nx.Graph):
+    """
+    Return an igraph mirror of G plus the node-id list mapping igraph vertex
+    indices back to G's nodes. Cached on G.graph; G stays the source of truth.
+    """
+    if 'igraph' not in G.graph:
+        src, dst = edge_arrays(G)
+        G.graph['igraph'] = ig.Graph(n=len(node_arrays(G)['index']),
+                                     edges=np.column_stack((src, dst)).tolist())
+    return G.graph['igraph'], G.graph['node_ids']
+
+
 def detect_communities(G: nx.Graph = None):
     """
     Detect communities using connected components (proxy for Louvain in free tier).
+    Without an explicit G, results are cached per graph version.
     """
     if G is None:
-        G = build_networkx_graph()
+        return _detect_communities_cached(graph_version())
+    return _detect_communities(G)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _detect_communities_cached(version_key):
+    return _detect_communities(_build_networkx_graph_cached(version_key))
+
+
+def _detect_communities(G: nx.Graph):
+    soa = node_arrays(G)
+    node_ids = G.graph['node_ids']
+    
+    # Use connected components as base communities (compiled union-find over CSR)
+    n_comp, comp_labels = connected_components(to_csr(G), directed=False)
     
-    # Use connected components as base communities
-    communities = list(nx.connected_components(G))
+    # Filter to suspicious communities (more than 3 members) in one vectorized pass,
+    # then slice only those out of the label-sorted node order
+    sizes = np.bincount(comp_labels, minlength=n_comp)
+    # Both endpoints of an edge share a component, so this is each one's internal edge count
+    edge_counts = np.bincount(comp_labels[edge_arrays(G)[0]], minlength=n_comp)
+    keep = np.flatnonzero(sizes >= 4)
+    order = np.argsort(comp_labels, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    
+    communities = [(order[offsets[i]:offsets[i + 1]], int(edge_counts[i])) for i in keep]
+    
+    # Node types as integer codes, so per-community counts are numeric uniques
+    type_names, type_codes = np.unique(soa['labels'], return_inverse=True)
+    scores = _score_communities(soa['flagged'], soa['is_fraud'], type_codes, communities)
     
-    # Filter to suspicious communities (more than 3 members)
     suspicious_communities = []
-    for i, comm in enumerate(communities):
-        if len(comm) >= 4:
-            # Score based on flagged nodes
-            flagged_count = sum(1 for n in comm if G.nodes[n].get('flagged', False))
-            fraud_count = sum(1 for n in comm if G.nodes[n].get('is_fraud', False))
-            
-            # Get node types distribution
-            labels = defaultdict(int)
-            for n in comm:
-                labels[G.nodes[n].get('label', 'Unknown')] += 1
-            
-            suspicious_communities.append({
-                'community_id': i,
-                'size': len(comm),
-                'members': list(comm),
-                'flagged_count': flagged_count,
-                'fraud_count': fraud_count,
-                'node_types': dict(labels),
-                'risk_score': calculate_community_risk_score(comm, G)
-            })
+    for i, (comm_idx, _), (flagged_count, fraud_count, types, risk_score) in zip(keep, communities, scores):
+        suspicious_communities.append({
+            'community_id': int(i),
+            'size': len(comm_idx),
+            'members': [node_ids[j] for j in comm_idx],
+            'flagged_count': flagged_count,
+            'fraud_count': fraud_count,
+            'node_types': {type_names[code]: count for code, count in types.items()},
+            'risk_score': risk_score
+        })
     
     # Sort by risk score
     suspicious_communities.sort(key=lambda x: x['risk_score'], reverse=True)
@@ -84,34 +326,72 @@ def detect_communities(G: nx.Graph = None):
     return suspicious_communities
 
 
-def calculate_community_risk_score(community: set, G: nx.Graph) -> float:
-    """Calculate risk score for a community."""
+def _score_communities(flagged: np.ndarray, is_fraud: np.ndarray, type_codes: np.ndarray, communities):
+    """
+    Score (comm_idx, internal_edges) pairs against the per-node flag and type-code arrays.
+    Returns (flagged_count, fraud_count, {type code: count}, risk_score) per community.
+    """
+    scores = []
+    for comm_idx, internal_edges in communities:
+        flagged_count = int(flagged[comm_idx].sum())
+        fraud_count = int(is_fraud[comm_idx].sum())
+        codes, counts = np.unique(type_codes[comm_idx], return_counts=True)
+        scores.append((
+            flagged_count,
+            fraud_count,
+            dict(zip(codes.tolist(), counts.tolist())),
+            _community_risk(len(comm_idx), flagged_count, fraud_count, internal_edges)
+        ))
+    return scores
+
+
+def calculate_community_risk_score(community: set, G: nx.Graph, comm_idx: np.ndarray = None,
+                                   internal_edges: int = None) -> float:
+    """
+    Calculate risk score for a community. Pass `comm_idx` and `internal_edges`
+    if already computed.
+    """
     if len(community) < 2:
         return 0.0
     
+    if comm_idx is None:
+        comm_idx = community_index(community, G)
+    soa = node_arrays(G)
+    
+    # Internal edges counted off the edge arrays with a membership mask (no subgraph copy)
+    if internal_edges is None:
+        src, dst = edge_arrays(G)
+        member = np.zeros(len(G.graph['node_ids']), dtype=bool)
+        member[comm_idx] = True
+        internal_edges = int(np.count_nonzero(member[src] & member[dst]))
+    
+    return _community_risk(
+        len(comm_idx),
+        int(soa['flagged'][comm_idx].sum()),
+        int(soa['is_fraud'][comm_idx].sum()),
+        internal_edges
+    )
+
+
+def _community_risk(size: int, flagged: int, fraud: int, internal_edges: int) -> float:
+    if size < 2:
+        return 0.0
+    
     score = 0.0
     
     # Factor 1: Flagged entities (0-30 points)
-    flagged = sum(1 for n in community if G.nodes[n].get('flagged', False))
     score += min(flagged * 10, 30)
     
     # Factor 2: Known fraud indicators (0-40 points)
-    fraud = sum(1 for n in community if G.nodes[n].get('is_fraud', False))
     score += min(fraud * 5, 40)
     
     # Factor 3: Network density (0-20 points)
-    subgraph = G.subgraph(community)
-    if len(community) > 1:
-        try:
-            density = nx.density(subgraph)
-            score += density * 20
-        except:
-            pass
+    score += 2 * internal_edges / (size * (size - 1)) * 20
     
     # Factor 4: Size bonus for medium communities
-    if 5 <= len(community) <= 20:
+    if 5 <= size <= 20:
         score += 10
-    elif len(community) > 20:
+    elif size > 20:
         score += 5
     
     return round(score, 2)
@@ -120,60 +400,121 @@ def calculate_community_risk_score(community: set, G: nx.Graph) -> float:
 def calculate_node_centrality(G: nx.Graph = None):
     """
     Calculate centrality metrics for all nodes.
+    Without an explicit G, results are cached per graph version.
     """
     if G is None:
-        G = build_networkx_graph()
+        return _calculate_node_centrality_cached(graph_version())
+    return _calculate_node_centrality(G)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _calculate_node_centrality_cached(version_key):
+    return _calculate_node_centrality(_build_networkx_graph_cached(version_key))
+
+
+def _calculate_node_centrality(G: nx.Graph):
+    g, node_ids = to_igraph(G)
+    num_nodes = len(node_ids)
+    
+    arrays = node_arrays(G)
     
     # Degree centrality
-    degree_cent = nx.degree_centrality(G)
+    deg_scale = 1 / (num_nodes - 1) if num_nodes > 1 else 0
+    degree_cent = np.asarray(g.degree(), dtype=float) * deg_scale
     
-    # Betweenness centrality (approximate for speed)
+    # Betweenness centrality (C implementation, paths bounded to fraud-ring radius),
+    # normalized the same way as nx.betweenness_centrality for undirected graphs
     try:
-        betweenness = nx.betweenness_centrality(G, k=min(200, len(G)))
+        bc_scale = 2 / ((num_nodes - 1) * (num_nodes - 2)) if num_nodes > 2 else 0
+        betweenness = np.asarray(g.betweenness(directed=False, cutoff=BETWEENNESS_CUTOFF)) * bc_scale
     except:
-        betweenness = {n: 0 for n in G.nodes()}
-    
-    results = []
-    for node_id in G.nodes():
-        node_data = G.nodes[node_id]
-        results.append({
-            'id': node_id,
-            'name': node_data.get('name') or node_id, # Fix for None
-            'type': node_data.get('label', 'Unknown'),
-            'degree_centrality': round(degree_cent.get(node_id, 0), 4),
-            'betweenness_centrality': round(betweenness.get(node_id, 0), 4),
-            'combined_score': round(
-                degree_cent.get(node_id, 0) * 0.4 + 
-                betweenness.get(node_id, 0) * 0.6, 4
-            ),
-            'flagged': node_data.get('flagged', False),
-            'is_fraud': node_data.get('is_fraud', False)
-        })
+        betweenness = np.zeros(num_nodes)
     
-    results.sort(key=lambda x: x['combined_score'], reverse=True)
-    return results
+    results = pd.DataFrame({
+        'id': node_ids,
+        'name': node_properties(G)['name'], # Fix for None
+        'type': arrays['labels'],
+        'degree_centrality': degree_cent,
+        'betweenness_centrality': betweenness,
+        'combined_score': degree_cent * 0.4 + betweenness * 0.6,
+        'flagged': arrays['flagged'],
+        'is_fraud': arrays['is_fraud'],
+    })
+    return (results.round(4)
+                   .sort_values('combined_score', ascending=False, kind='stable')
+                   .to_dict('records'))
+
+
+# Pattern 1: Repair Shop Clustering
+SHOP_CLUSTERING_QUERY = """
+    MATCH (shop:RepairShop)<-[:REPAIRED_AT]-(cl:Claim)<-[:FILED]-(c:Claimant)
+    WITH shop, collect(DISTINCT c) as claimants
+    WHERE size(claimants) > 3
+    RETURN shop.name as entity, shop.id as entity_id, 
+           'Repair Shop Clustering' as pattern_type,
+           size(claimants) as connected_claimants,
+           shop.flagged as is_flagged
+    ORDER BY connected_claimants DESC
+"""
+
+# Pattern 2: Medical Mill
+MEDICAL_MILL_QUERY = """
+    MATCH (c:Claimant)-[:FILED]->(cl:Claim)-[:TREATED_AT]->(mp:MedicalProvider)
+    WITH mp, collect(DISTINCT c) as claimants
+    WHERE size(claimants) > 4
+    RETURN mp.name as entity, mp.id as entity_id,
+           'Medical Mill' as pattern_type,
+           size(claimants) as connected_claimants,
+           mp.flagged as is_flagged
+    ORDER BY connected_claimants DESC
+"""
+
+# Pattern 3: Attorney Steering
+ATTORNEY_STEERING_QUERY = """
+    MATCH (a:Attorney)-[:REPRESENTS]->(cl:Claim)<-[:FILED]-(c:Claimant)
+    OPTIONAL MATCH (cl)-[:REPAIRED_AT]->(shop:RepairShop)
+    WITH a, collect(DISTINCT c) as claimants, collect(DISTINCT shop) as shops
+    WHERE size(claimants) > 4
+    RETURN a.name as entity, a.id as entity_id,
+           'Attorney Steering' as pattern_type,
+           size(claimants) as connected_claimants,
+           size(shops) as unique_shops,
+           a.flagged as is_flagged
+    ORDER BY connected_claimants DESC
+"""
+
+
+def _run_in_own_session(driver, query):
+    # Sessions are not thread-safe; the driver is, so each worker opens its own
+    with open_session(driver, default_access_mode=READ_ACCESS) as session:
+        return run_query(query, session=session)
 
 
 def detect_collusion_patterns():
     """
     Detect specific collusion patterns using Cypher queries.
+    Results are cached per graph version.
     """
+    return _detect_collusion_patterns_cached(graph_version())
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _detect_collusion_patterns_cached(version_key):
     patterns_found = []
     
-    # Pattern 1: Repair Shop Clustering
-    shop_pattern = run_query("""
-        MATCH (c1:Claimant)-[:FILED]->(cl1:Claim)-[:REPAIRED_AT]->(shop:RepairShop)
-              <-[:REPAIRED_AT]-(cl2:Claim)<-[:FILED]-(c2:Claimant)
-        WHERE c1.id < c2.id
-        WITH shop, collect(DISTINCT c1) + collect(DISTINCT c2) as claimants
-        WHERE size(claimants) > 3
-        RETURN shop.name as entity, shop.id as entity_id, 
-               'Repair Shop Clustering' as pattern_type,
-               size(claimants) as connected_claimants,
-               shop.flagged as is_flagged
-        ORDER BY connected_claimants DESC
-    """)
+    # Resolved here, on the script thread; workers only receive the driver
+    driver = driver_or_none()
+    if driver is None:
+        return patterns_found
     
+    # The three pattern queries are independent; overlap their round-trips
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        shop_pattern, medical_pattern, attorney_pattern = pool.map(
+            lambda query: _run_in_own_session(driver, query),
+            [SHOP_CLUSTERING_QUERY, MEDICAL_MILL_QUERY, ATTORNEY_STEERING_QUERY]
+        )
+    
+    # Pattern 1: Repair Shop Clustering
     for p in shop_pattern:
         patterns_found.append({
             'pattern_type': 'Repair Shop Clustering',
@@ -186,17 +527,6 @@ def detect_collusion_patterns():
         })
     
     # Pattern 2: Medical Mill
-    medical_pattern = run_query("""
-        MATCH (c:Claimant)-[:FILED]->(cl:Claim)-[:TREATED_AT]->(mp:MedicalProvider)
-        WITH mp, collect(DISTINCT c) as claimants
-        WHERE size(claimants) > 4
-        RETURN mp.name as entity, mp.id as entity_id,
-               'Medical Mill' as pattern_type,
-               size(claimants) as connected_claimants,
-               mp.flagged as is_flagged
-        ORDER BY connected_claimants DESC
-    """)
-    
     for p in medical_pattern:
         patterns_found.append({
             'pattern_type': 'Medical Mill',
@@ -209,19 +539,6 @@ def detect_collusion_patterns():
         })
 
     # Pattern 3: Attorney Steering
-    attorney_pattern = run_query("""
-        MATCH (a:Attorney)-[:REPRESENTS]->(cl:Claim)<-[:FILED]-(c:Claimant)
-        OPTIONAL MATCH (cl)-[:REPAIRED_AT]->(shop:RepairShop)
-        WITH a, collect(DISTINCT c) as claimants, collect(DISTINCT shop) as shops
-        WHERE size(claimants) > 4
-        RETURN a.name as entity, a.id as entity_id,
-               'Attorney Steering' as pattern_type,
-               size(claimants) as connected_claimants,
-               size(shops) as unique_shops,
-               a.flagged as is_flagged
-        ORDER BY connected_claimants DESC
-    """)
-    
     for p in attorney_pattern:
         shop_ratio = p['unique_shops'] / max(p['connected_claimants'], 1)
         patterns_found.append({
@@ -241,8 +558,17 @@ def calculate_claim_risk_score(claim_id: str):
     """
     Calculate contextual fraud risk score for a specific claim.
     """
+    return calculate_claim_risk_scores([claim_id])[claim_id]
+
+
+def calculate_claim_risk_scores(claim_ids: list):
+    """
+    Calculate contextual fraud risk scores for many claims in one round-trip.
+    Returns {claim_id: score dict, or None if the claim was not found}.
+    """
     context = run_query("""
-        MATCH (c:Claimant)-[:FILED]->(claim:Claim {id: $claim_id})
+        UNWIND $claim_ids AS claim_id
+        MATCH (c:Claimant)-[:FILED]->(claim:Claim {id: claim_id})
         OPTIONAL MATCH (claim)-[:REPAIRED_AT]->(shop:RepairShop)
         OPTIONAL MATCH (claim)-[:TREATED_AT]->(mp:MedicalProvider)
         OPTIONAL MATCH (claim)<-[:REPRESENTS]-(att:Attorney)
@@ -252,9 +578,10 @@ def calculate_claim_risk_score(claim_id: str):
         // Count neighbors' other connections (The "Network Context")
         OPTIONAL MATCH (shop)<-[:REPAIRED_AT]-(other_claim:Claim)
         WHERE other_claim.id <> claim.id
-        WITH c, claim, shop, mp, att, wit, phone, count(DISTINCT other_claim) as shop_claim_count
+        WITH claim_id, c, claim, shop, mp, att, wit, phone, count(DISTINCT other_claim) as shop_claim_count
         
-        RETURN c.name as claimant_name, c.id as claimant_id,
+        RETURN claim_id,
+               c.name as claimant_name, c.id as claimant_id,
                claim.amount as amount, claim.injury_type as injury,
                claim.is_fraudulent as is_fraud, claim.ring_id as ring_id,
                shop.name as shop_name, shop.flagged as shop_flagged,
@@ -263,12 +590,20 @@ def calculate_claim_risk_score(claim_id: str):
                wit.name as witness_name, wit.flagged as witness_flagged,
                phone.number as phone_number, phone.flagged as phone_flagged,
                shop_claim_count
-    """, {'claim_id': claim_id})
+    """, {'claim_ids': list(claim_ids)})
     
-    if not context:
+    # First context row per claim, as the single-claim query used
+    contexts = {}
+    for row in context or []:
+        contexts.setdefault(row['claim_id'], row)
+    
+    return {claim_id: _score_claim_context(claim_id, contexts.get(claim_id)) for claim_id in claim_ids}
+
+
+def _score_claim_context(claim_id: str, ctx: dict):
+    if not ctx:
         return None
     
-    ctx = context[0]
     risk_factors = []
     risk_score = 0
     
@@ -302,36 +637,82 @@ def calculate_claim_risk_score(claim_id: str):
         'is_known_fraud': ctx.get('is_fraud', False)
     }
 
+# Ego networks bind `nodes` and `relationships` for EGO_PROJECTION. APOC expands
+# each node once (no per-path duplication); without APOC the same subgraph (all
+# relationships among the nodes within $hops, capped at $limit nodes) is built
+# from a bounded variable-length match.
+EGO_QUERY_APOC = """
+MATCH (center {id: $center_id})
+CALL apoc.path.subgraphAll(center, {maxLevel: $hops, limit: $limit})
+YIELD nodes, relationships
+"""
+
+EGO_QUERY_MATCH = """
+MATCH (center {id: $center_id})
+OPTIONAL MATCH (center)-[*0..__MAX_HOPS__]-(m)
+WITH center, collect(DISTINCT m) AS reached
+WITH [center] + [m IN reached WHERE m <> center][..($limit - 1)] AS nodes
+CALL {
+    WITH nodes
+    UNWIND nodes AS a
+    MATCH (a)-[r]->(b)
+    WHERE b IN nodes
+    RETURN collect(r) AS relationships
+}
+"""
+
+# Node/edge maps projected server-side, in get_network_for_visualization's shape
+EGO_PROJECTION = """
+RETURN [n IN nodes | {
+            id: n.id, type: coalesce(labels(n)[0], 'Unknown'), name: coalesce(n.name, n.id),
+            flagged: coalesce(n.flagged, false), is_fraud: coalesce(n.is_fraudulent, false),
+            amount: n.amount, ring_id: n.ring_id
+        }] AS nodes,
+       [r IN relationships | {
+            source: startNode(r).id, target: endNode(r).id, rel_type: type(r)
+        }] AS edges
+"""
+
+# Cleared the first time the database reports the APOC procedure missing
+_apoc_available = True
+
+
 def get_network_for_visualization(center_id: str = None, hops: int = 2, limit: int = 150):
     """
     Get network data formatted for streamlit-agraph visualization.
     """
     if center_id:
-        # Ego network
-        query = f"""
-        MATCH path = (center {{id: $center_id}})-[*1..{hops}]-(connected)
-        WITH nodes(path) as ns, relationships(path) as rs
-        UNWIND ns as n
-        WITH DISTINCT n, rs
-        UNWIND rs as r
-        RETURN DISTINCT 
-            n.id as node_id, labels(n)[0] as node_type, n.name as node_name,
-            n.flagged as flagged, n.is_fraudulent as is_fraud, n.amount as amount, n.ring_id as ring_id,
-            startNode(r).id as source, endNode(r).id as target, type(r) as rel_type
-        LIMIT $limit
-        """
-        results = run_query(query, {'center_id': center_id, 'limit': limit})
-    else:
-        # Generic sample (rarely used now)
-        query = """
-        MATCH (n)-[r]->(m)
-        RETURN DISTINCT
-            n.id as source, m.id as target, type(r) as rel_type,
-            n.id as node_id, labels(n)[0] as node_type, n.name as node_name,
-            n.flagged as flagged, n.is_fraudulent as is_fraud
-        LIMIT $limit
-        """
-        results = run_query(query, {'limit': limit})
+        # Served from the in-memory graph when it matches the database
+        if _latest_graph is not None and _latest_graph[0] == graph_version():
+            return _ego_network_from_graph(_latest_graph[1], center_id, hops, limit)
+        
+        global _apoc_available
+        params = {'center_id': center_id, 'hops': hops, 'limit': limit}
+        results = None
+        if _apoc_available:
+            try:
+                results = run_query(EGO_QUERY_APOC + EGO_PROJECTION, params)
+            except ClientError as e:
+                if e.code != 'Neo.ClientError.Procedure.ProcedureNotFound':
+                    raise
+                _apoc_available = False
+        if not _apoc_available:
+            # Variable-length bounds can't be parameters, hence the interpolated int
+            results = run_query(EGO_QUERY_MATCH.replace("__MAX_HOPS__", str(int(hops))) + EGO_PROJECTION, params)
+        if not results:
+            return {'nodes': [], 'edges': []}
+        return {'nodes': results[0]['nodes'], 'edges': results[0]['edges']}
+    
+    # Generic sample (rarely used now)
+    query = """
+    MATCH (n)-[r]->(m)
+    RETURN DISTINCT
+        n.id as source, m.id as target, type(r) as rel_type,
+        n.id as node_id, labels(n)[0] as node_type, n.name as node_name,
+        n.flagged as flagged, n.is_fraudulent as is_fraud
+    LIMIT $limit
+    """
+    results = run_query(query, {'limit': limit})
     
     nodes = {}
     edges = []
@@ -357,4 +738,36 @@ def get_network_for_visualization(center_id: str = None, hops: int = 2, limit: i
                 'rel_type': r.get('rel_type', 'RELATED')
             })
             
-    return {'nodes': list(nodes.values()), 'edges': edges}
\ No newline at end of file
+    return {'nodes': list(nodes.values()), 'edges': edges}
+
+
+def _ego_network_from_graph(G: nx.Graph, center_id: str, hops: int, limit: int):
+    """get_network_for_visualization's ego network, answered from an already-built graph."""
+    soa = node_arrays(G)
+    if center_id not in soa['index']:
+        return {'nodes': [], 'edges': []}
+    
+    ego = ego_node_indices(G, soa['index'][center_id], hops, limit)
+    in_ego = np.zeros(len(soa['labels']), dtype=bool)
+    in_ego[ego] = True
+    src, dst, types = relationship_arrays(G)
+    keep = in_ego[src] & in_ego[dst]
+    
+    node_ids = G.graph['node_ids']
+    props = node_properties(G)
+    nodes = [{
+        'id': node_ids[i],
+        'type': soa['labels'][i],
+        'name': props['name'][i],
+        'flagged': bool(soa['flagged'][i]),
+        'is_fraud': bool(soa['is_fraud'][i]),
+        'amount': props['amount'][i],
+        'ring_id': props['ring_id'][i]
+    } for i in ego.tolist()]
+    edges = [{
+        'source': node_ids[a],
+        'target': node_ids[b],
+        'rel_type': rel_type
+    } for a, b, rel_type in zip(src[keep].tolist(), dst[keep].tolist(), types[keep].tolist())]
+    
+    return {'nodes': nodes, 'edges': edges}
@@ -1,63 +1,186 @@
+import logging
+import time
 import streamlit as st
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, READ_ACCESS
+from neo4j.exceptions import Neo4jError
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+# Labels looked up by `id` in the demo and fraud-detection queries; each gets a
+# uniqueness constraint so `{id: ...}` / `id IN $ids` lookups become index seeks
+# instead of label scans.
+SCHEMA_LABELS = [
+    'Claim', 'Person', 'Policy', 'Vehicle', 'Shop', 'Doctor', 'Attorney', 'Phone', 'Address',
+    'Claimant', 'RepairShop', 'MedicalProvider', 'Witness',
+]
+
+# (label, property) pairs used as boolean filters
+SCHEMA_INDEXES = [('Claim', 'flagged')]
+
+def _ensure_schema(driver):
+    """
+    Create the id uniqueness constraints and property indexes (idempotent).
+    They only speed lookups up, so a statement that fails (duplicate ids, missing
+    schema privileges, a conflicting existing index) is logged and skipped.
+    """
+    statements = [
+        f"CREATE CONSTRAINT {label.lower()}_id IF NOT EXISTS "
+        f"FOR (n:{label}) REQUIRE n.id IS UNIQUE"
+        for label in SCHEMA_LABELS
+    ] + [
+        f"CREATE INDEX {label.lower()}_{prop} IF NOT EXISTS "
+        f"FOR (n:{label}) ON (n.{prop})"
+        for label, prop in SCHEMA_INDEXES
+    ]
+    with driver.session() as session:
+        for statement in statements:
+            try:
+                session.run(statement).consume()
+            except Neo4jError as e:
+                logger.warning("Skipping schema statement %r: %s", statement, e)
+
+@st.cache_resource(show_spinner=False)
+def get_driver():
+    """Process-wide Neo4j driver (thread-safe, pooled) shared by every session and rerun."""
+    secrets = st.secrets["neo4j"]
+    driver = GraphDatabase.driver(
+        secrets["uri"], 
+        auth=(secrets["username"], secrets["password"]),
+        max_connection_pool_size=50
+    )
+    try:
+        driver.verify_connectivity()
+        _ensure_schema(driver)
+    except Exception:
+        # Failures aren't cached, so don't leave this attempt's pool behind
+        driver.close()
+        raise
+    return driver
+
+# A failed connection attempt is remembered briefly, so the several lookups made
+# during one rerun don't each wait out the connection timeout again
+CONNECT_RETRY_SECONDS = 10
+_connect_failure = None
+
+def _connect():
+    global _connect_failure
+    if _connect_failure is not None and time.monotonic() - _connect_failure[0] < CONNECT_RETRY_SECONDS:
+        raise _connect_failure[1]
+    try:
+        driver = get_driver()
+    except Exception as e:
+        _connect_failure = (time.monotonic(), e)
+        raise
+    _connect_failure = None
+    return driver
 
 def init_driver():
-    """Initialize Neo4j driver from secrets."""
-    if 'neo4j_driver' not in st.session_state:
-        try:
-            secrets = st.secrets["neo4j"]
-            driver = GraphDatabase.driver(
-                secrets["uri"], 
-                auth=(secrets["username"], secrets["password"])
-            )
-            driver.verify_connectivity()
-            st.session_state.neo4j_driver = driver
-        except Exception as e:
-            st.error(f"Failed to connect to Neo4j: {e}")
-
-def is_connected():
-    return 'neo4j_driver' in st.session_state and st.session_state.neo4j_driver is not None
-
-def run_query(query, params=None):
-    """Run a query and return formatted for visualization."""
-    if not is_connected(): return None
+    """Initialize Neo4j driver from secrets, reporting connection failures in the UI."""
+    try:
+        return _connect()
+    except Exception as e:
+        st.error(f"Failed to connect to Neo4j: {e}")
+
+def driver_or_none():
+    """The shared driver, or None if the database can't be reached (no UI error)."""
+    try:
+        return _connect()
+    except Exception:
+        return None
+
+# Shared by every session this process opens, so a read that follows a write
+# (e.g. after Generate) waits for it even when routed to a cluster follower
+_bookmarks = GraphDatabase.bookmark_manager()
+
+def open_session(driver, **config):
+    """Open a session that participates in the process-wide causal chain."""
+    return driver.session(bookmark_manager=_bookmarks, **config)
+
+def _reader_session():
+    """
+    READ session reused across every query of one browser session (held in
+    st.session_state), so reruns don't re-open a session per query. Returns
+    None outside a script run, e.g. in worker threads, where sessions can't be
+    shared.
+    """
+    if get_script_run_ctx() is None: return None
+    driver = driver_or_none()
+    if driver is None: return None
     
-    with st.session_state.neo4j_driver.session() as session:
-        result = session.run(query, params or {})
-        
-        # Parse into Agraph format
-        nodes = {}
-        edges = []
+    cached = st.session_state.get('neo4j_session')
+    if cached is None or cached[0] is not driver:
+        if cached is not None:
+            # The driver was replaced; release the session that belongs to the old one
+            try:
+                cached[1].close()
+            except Exception:
+                pass
+        cached = (driver, open_session(driver, default_access_mode=READ_ACCESS))
+        st.session_state['neo4j_session'] = cached
+    return cached[1]
+
+def run_query(query, params=None, session=None):
+    """
+    Run a read query and return its records as plain dicts.
+    Uses `session` if given (e.g. one per worker thread), otherwise the
+    browser session's reader session, falling back to a fresh one.
+    """
+    if session is None:
+        session = _reader_session()
+        if session is not None:
+            try:
+                return _read(session, query, params)
+            except Exception:
+                # Don't keep a session whose connection may be broken
+                st.session_state.pop('neo4j_session', None)
+                session.close()
+                raise
         
-        for record in result:
-            path = record['path']
-            # Neo4j Path objects contain nodes and relationships
-            for n in path.nodes:
-                # Capture all properties for the rich tooltip
-                props = dict(n)
-                
-                nodes[n.element_id] = {
-                    'id': n.element_id,
-                    'label': n.get('label', n.get('id', 'Node')),
-                    'type': list(n.labels)[0] if n.labels else 'Unknown',
-                    'is_fraud': n.get('is_fraud', False),
-                    'flagged': n.get('flagged', False),
-                    'properties': props  # Pass all properties to UI
-                }
-            
-            for r in path.relationships:
-                edges.append({
-                    'source': r.start_node.element_id,
-                    'target': r.end_node.element_id,
-                    'type': r.type
-                })
-                
-        return {'nodes': list(nodes.values()), 'edges': edges}
+        driver = driver_or_none()
+        if driver is None: return None
+        with open_session(driver, default_access_mode=READ_ACCESS) as session:
+            return _read(session, query, params)
+    
+    return _read(session, query, params)
+
+def _read(session, query, params):
+    return session.execute_read(lambda tx: [record.data() for record in tx.run(query, params or {})])
+
+def stream_query(query, params=None, fetch_size=10_000):
+    """Yield records as plain dicts while they are fetched, without materializing the result."""
+    driver = driver_or_none()
+    if driver is None: return
+    
+    with open_session(driver, default_access_mode=READ_ACCESS, fetch_size=fetch_size) as session:
+        for record in session.run(query, params or {}):
+            yield record.data()
+
+def run_query_as_graph(query, params=None, session=None):
+    """Run a query that returns a single (nodes, edges) row, formatted for visualization."""
+    # Nodes/edges are already projected and deduplicated in Cypher
+    rows = run_query(query, params, session)
+    if not rows: return None
+    return {'nodes': rows[0]['nodes'], 'edges': rows[0]['edges']}
+
+# Bumped after every committed write so graph-derived caches can key on it
+_write_version = 0
+
+def get_write_version():
+    return _write_version
 
 def run_query_transaction(queries):
-    """Run a list of write queries."""
-    if not is_connected(): return
+    """Run a list of write queries (plain strings or (query, params) tuples) in one transaction."""
+    driver = driver_or_none()
+    if driver is None: return
     
-    with st.session_state.neo4j_driver.session() as session:
+    def _write(tx):
         for q in queries:
-            session.run(q)
\ No newline at end of file
+            query, params = q if isinstance(q, tuple) else (q, None)
+            tx.run(query, params or {})
+    
+    with open_session(driver) as session:
+        session.execute_write(_write)
+    
+    global _write_version
+    _write_version += 1
\ No newline at end of file
@@ -0,0 +1,46 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+SNAPSHOT_DIR = Path(__file__).parent / "snapshots"
+
+def _snapshot_path(scenario_id):
+    return SNAPSHOT_DIR / f"scenario_{scenario_id}.json"
+
+@lru_cache(maxsize=None)
+def load_snapshot(scenario_id):
+    """Load a pre-built scenario graph from disk. Treat the result as read-only."""
+    return json.loads(_snapshot_path(scenario_id).read_text(encoding="utf-8"))
+
+def write_snapshot(scenario_id, data):
+    """Persist a scenario graph produced by `data_generator.build_snapshot`."""
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    _snapshot_path(scenario_id).write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    load_snapshot.cache_clear()
+
+def ego_subgraph(data, center_id, hops):
+    """Nodes within `hops` of `center_id` and the edges on those paths (undirected)."""
+    adjacency = {}
+    for e in data['edges']:
+        adjacency.setdefault(e['source'], []).append(e['target'])
+        adjacency.setdefault(e['target'], []).append(e['source'])
+
+    dist = {center_id: 0}
+    frontier = [center_id]
+    for depth in range(1, hops + 1):
+        nxt = []
+        for u in frontier:
+            for v in adjacency.get(u, ()):
+                if v not in dist:
+                    dist[v] = depth
+                    nxt.append(v)
+        frontier = nxt
+
+    if len(dist) == 1:
+        return None
+    return {
+        'nodes': [n for n in data['nodes'] if n['id'] in dist],
+        'edges': [e for e in data['edges']
+                  if e['source'] in dist and e['target'] in dist
+                  and min(dist[e['source']], dist[e['target']]) < hops]
+    }